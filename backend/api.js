@@ -14,30 +14,101 @@ app.use(cors({
 
 app.use(express.json());
 
+const NSE_EQUITY_LIST_URL = 'https://archives.nseindia.com/content/equities/EQUITY_L.csv';
+
+// How long the downloaded equity list is reused before fetching it again
+const INSTRUMENTS_TTL_MS = 60 * 60 * 1000;
+
+// How long to wait before retrying NSE after a failed download
+const INSTRUMENTS_RETRY_MS = 5 * 60 * 1000;
+
+// Abandon an NSE download that has not completed within this time
+const NSE_REQUEST_TIMEOUT_MS = 15 * 1000;
+
+// Last successfully downloaded equity list: { instruments, bySymbol }
+let instrumentsCache = null;
+let instrumentsRefreshAt = 0;
+
+// Download in progress, shared by concurrent requests
+let instrumentsRefresh = null;
+
+/**
+ * Parse the NSE equity list CSV into instrument objects
+ * @param {string} csv - Raw CSV contents
+ * @returns {Array} Instruments
+ */
+const parseInstruments = (csv) => {
+    const lines = csv.split('\n');
+    return lines.slice(1).filter(line => line.trim() !== '').map(line => {
+        const values = line.split(',');
+        return {
+            symbol: values[0],
+            name: values[1],
+            series: values[2],
+            dateOfListing: values[3],
+            paidUpValue: values[4],
+            marketLot: values[5],
+            isinNumber: values[6],
+            faceValue: values[7]
+        };
+    });
+};
+
+/**
+ * Download and parse the NSE equity list, replacing the cached list on success
+ * @returns {Promise<Object>} Instruments array and a lowercase symbol lookup
+ */
+const refreshInstruments = () => {
+    if (!instrumentsRefresh) {
+        instrumentsRefresh = axios.get(NSE_EQUITY_LIST_URL, { timeout: NSE_REQUEST_TIMEOUT_MS })
+            .then(response => {
+                const instruments = parseInstruments(response.data);
+                const bySymbol = new Map(instruments.map(inst => [inst.symbol.toLowerCase(), inst]));
+
+                // Only replace the cached list once the new download has succeeded
+                instrumentsCache = { instruments, bySymbol };
+                instrumentsRefreshAt = Date.now() + INSTRUMENTS_TTL_MS;
+                return instrumentsCache;
+            })
+            .catch(error => {
+                // Back off so an NSE outage is not retried on every request
+                instrumentsRefreshAt = Date.now() + INSTRUMENTS_RETRY_MS;
+                throw error;
+            })
+            .finally(() => {
+                instrumentsRefresh = null;
+            });
+    }
+    return instrumentsRefresh;
+};
+
+/**
+ * Get all NSE instruments, downloading the equity list at most once per TTL
+ * @returns {Promise<Object>} Instruments array and a lowercase symbol lookup
+ */
+const getInstruments = async () => {
+    // Nothing to serve yet, so the first request has to wait for the download
+    if (!instrumentsCache) {
+        return refreshInstruments();
+    }
+
+    // Serve the cached list immediately and refresh it in the background once it is stale
+    if (Date.now() >= instrumentsRefreshAt && !instrumentsRefresh) {
+        refreshInstruments().catch(error => {
+            console.error("❌ Failed to refresh instruments, serving cached list:", error.message);
+        });
+    }
+
+    return instrumentsCache;
+};
+
 /**
  * Get all instruments from NSE
  */
 app.get("/instruments", async (req, res) => {
     try {
         // Using NSE's public API to get instrument data
-        const response = await axios.get('https://archives.nseindia.com/content/equities/EQUITY_L.csv');
-        
-        // Parse CSV data
-        const lines = response.data.split('\n');
-        const headers = lines[0].split(',');
-        const instruments = lines.slice(1).map(line => {
-            const values = line.split(',');
-            return {
-                symbol: values[0],
-                name: values[1],
-                series: values[2],
-                dateOfListing: values[3],
-                paidUpValue: values[4],
-                marketLot: values[5],
-                isinNumber: values[6],
-                faceValue: values[7]
-            };
-        });
+        const { instruments } = await getInstruments();
 
         res.json({
             success: true,
@@ -67,27 +138,13 @@ app.get("/instruments/search", async (req, res) => {
             });
         }
 
-        const response = await axios.get('https://archives.nseindia.com/content/equities/EQUITY_L.csv');
-        const lines = response.data.split('\n');
-        const headers = lines[0].split(',');
+        const { instruments: allInstruments } = await getInstruments();
+        const needle = query.toLowerCase();
         
-        const instruments = lines.slice(1)
-            .map(line => {
-                const values = line.split(',');
-                return {
-                    symbol: values[0],
-                    name: values[1],
-                    series: values[2],
-                    dateOfListing: values[3],
-                    paidUpValue: values[4],
-                    marketLot: values[5],
-                    isinNumber: values[6],
-                    faceValue: values[7]
-                };
-            })
+        const instruments = allInstruments
             .filter(inst => 
-                inst.symbol.toLowerCase().includes(query.toLowerCase()) ||
-                inst.name.toLowerCase().includes(query.toLowerCase())
+                inst.symbol.toLowerCase().includes(needle) ||
+                inst.name.toLowerCase().includes(needle)
             );
 
         res.json({
@@ -118,25 +175,8 @@ app.get("/instruments/:symbol", async (req, res) => {
             });
         }
 
-        const response = await axios.get('https://archives.nseindia.com/content/equities/EQUITY_L.csv');
-        const lines = response.data.split('\n');
-        const headers = lines[0].split(',');
-        
-        const instrument = lines.slice(1)
-            .map(line => {
-                const values = line.split(',');
-                return {
-                    symbol: values[0],
-                    name: values[1],
-                    series: values[2],
-                    dateOfListing: values[3],
-                    paidUpValue: values[4],
-                    marketLot: values[5],
-                    isinNumber: values[6],
-                    faceValue: values[7]
-                };
-            })
-            .find(inst => inst.symbol.toLowerCase() === symbol.toLowerCase());
+        const { bySymbol } = await getInstruments();
+        const instrument = bySymbol.get(symbol.toLowerCase());
 
         if (!instrument) {
             return res.status(404).json({ 
@@ -1,12 +1,76 @@
 const { validationResult } = require('express-validator');
-const { OpenAI } = require('openai');
+const { getOpenAI, createChatCompletion, createJSONChatCompletion, toPromptJSON } = require('../services/openai.service');
 const Portfolio = require('../models/portfolio.model');
 
-// Initialize OpenAI client
-const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
+// Prompts that do not depend on the request are built once at load time
+const MARKET_INSIGHTS_MESSAGES = [
+  {
+    role: "system",
+    content: "You are an expert financial analyst specializing in market analysis and insights. Provide a concise but comprehensive overview of current market conditions, key trends, and potential opportunities or risks. Base your analysis on general market principles, and provide insights that would be valuable to retail investors."
+  },
+  {
+    role: "user",
+    content: "Please provide current market insights for retail investors. Focus on major indices, sectors showing strength or weakness, and any significant economic factors affecting markets. Also include any important events or data releases coming up that investors should be aware of."
+  }
+];
+
+// Structured output schema so stock picks always come back in the same shape
+const STOCK_PICKS_RESPONSE_FORMAT = {
+  type: "json_schema",
+  json_schema: {
+    name: "stock_picks",
+    strict: true,
+    schema: {
+      type: "object",
+      properties: {
+        picks: {
+          type: "array",
+          items: {
+            type: "object",
+            properties: {
+              symbol: { type: "string", description: "Ticker symbol" },
+              name: { type: "string", description: "Company name" },
+              sector: { type: "string" },
+              rationale: { type: "string", description: "Brief explanation of why the stock fits the criteria" },
+              risks: { type: "string", description: "Key risk considerations" }
+            },
+            required: ["symbol", "name", "sector", "rationale", "risks"],
+            additionalProperties: false
+          }
+        }
+      },
+      required: ["picks"],
+      additionalProperties: false
+    }
+  }
+};
+
+const INVESTMENT_ADVICE_SYSTEM_MESSAGE = {
+  role: "system",
+  content: "You are an expert financial advisor specializing in investment advice for retail investors. Provide professional, responsible, and actionable investment advice. Always include disclaimers about investment risks when appropriate. Base your advice on sound financial principles and avoid suggesting highly speculative or risky investments unless specifically asked."
+};
+
+const STOCK_PICKS_SYSTEM_MESSAGE = {
+  role: "system",
+  content: "You are an expert financial advisor specializing in stock selection for retail investors. Provide thoughtful stock suggestions based on the user's criteria. Include reasoning for each pick and relevant risk considerations. Format your response as a list of specific stocks with brief explanations, not general advice."
+};
+
+const TAX_OPTIMIZATION_SYSTEM_MESSAGE = {
+  role: "system",
+  content: "You are an expert tax advisor specializing in investment tax optimization for retail investors. Provide actionable tax optimization strategies based on the user's portfolio, focusing on tax-loss harvesting opportunities, long-term vs. short-term capital gains considerations, and other tax-efficient investment strategies. Include appropriate disclaimers about consulting with a tax professional."
+};
+
+// The optimization prompt varies only by the validated risk tolerance
+const optimizationSystemMessage = (riskTolerance) => ({
+  role: "system",
+  content: `You are an expert portfolio manager specializing in portfolio optimization. The user has a risk tolerance of ${riskTolerance}. Provide professional, actionable advice for optimizing their portfolio. Include recommendations for rebalancing, diversification, and potential adjustments based on their risk profile.`
 });
 
+const CHAT_SYSTEM_MESSAGE = {
+  role: "system",
+  content: "You are an expert financial advisor for retail investors. Provide professional, helpful, and accurate information about investing, personal finance, and financial markets. Always include appropriate disclaimers and risk warnings when discussing investment opportunities or strategies."
+};
+
 // @desc    Get investment advice
 // @route   POST /api/advisor/advice
 // @access  Private
@@ -21,13 +85,10 @@ exports.getInvestmentAdvice = async (req, res) => {
 
   try {
     // Use OpenAI for investment advice
-    const completion = await openai.chat.completions.create({
+    const completion = await createChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
-        {
-          role: "system",
-          content: "You are an expert financial advisor specializing in investment advice for retail investors. Provide professional, responsible, and actionable investment advice. Always include disclaimers about investment risks when appropriate. Base your advice on sound financial principles and avoid suggesting highly speculative or risky investments unless specifically asked."
-        },
+        INVESTMENT_ADVICE_SYSTEM_MESSAGE,
         {
           role: "user",
           content: message
@@ -78,16 +139,13 @@ exports.getPortfolioOptimizationAdvice = async (req, res) => {
     }));
 
     // Use OpenAI for portfolio optimization
-    const completion = await openai.chat.completions.create({
+    const completion = await createChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
-        {
-          role: "system",
-          content: `You are an expert portfolio manager specializing in portfolio optimization. The user has a risk tolerance of ${riskTolerance}. Provide professional, actionable advice for optimizing their portfolio. Include recommendations for rebalancing, diversification, and potential adjustments based on their risk profile.`
-        },
+        optimizationSystemMessage(riskTolerance),
         {
           role: "user",
-          content: `Here is my current portfolio: ${JSON.stringify(portfolioData, null, 2)}. Please provide optimization recommendations based on my ${riskTolerance} risk tolerance.`
+          content: `Here is my current portfolio: ${toPromptJSON(portfolioData)}. Please provide optimization recommendations based on my ${riskTolerance} risk tolerance.`
         }
       ]
     });
@@ -108,18 +166,9 @@ exports.getPortfolioOptimizationAdvice = async (req, res) => {
 exports.getMarketInsights = async (req, res) => {
   try {
     // Use OpenAI for market insights
-    const completion = await openai.chat.completions.create({
+    const completion = await createChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-      messages: [
-        {
-          role: "system",
-          content: "You are an expert financial analyst specializing in market analysis and insights. Provide a concise but comprehensive overview of current market conditions, key trends, and potential opportunities or risks. Base your analysis on general market principles, and provide insights that would be valuable to retail investors."
-        },
-        {
-          role: "user",
-          content: "Please provide current market insights for retail investors. Focus on major indices, sectors showing strength or weakness, and any significant economic factors affecting markets. Also include any important events or data releases coming up that investors should be aware of."
-        }
-      ]
+      messages: MARKET_INSIGHTS_MESSAGES
     });
 
     res.status(200).json({
@@ -146,23 +195,18 @@ exports.getStockPicks = async (req, res) => {
 
   try {
     // Use OpenAI for personalized stock picks
-    const completion = await openai.chat.completions.create({
+    const stockPicks = await createJSONChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
-        {
-          role: "system",
-          content: "You are an expert financial advisor specializing in stock selection for retail investors. Provide thoughtful stock suggestions based on the user's criteria. Include reasoning for each pick and relevant risk considerations. Format your response as a list of specific stocks with brief explanations, not general advice."
-        },
+        STOCK_PICKS_SYSTEM_MESSAGE,
         {
           role: "user",
-          content: `Please suggest stock picks based on the following criteria: ${JSON.stringify(criteria, null, 2)}. For each suggestion, please include the ticker symbol, company name, sector, and a brief explanation of why it fits my criteria.`
+          content: `Please suggest stock picks based on the following criteria: ${toPromptJSON(criteria)}.`
         }
       ],
-      response_format: { type: "json_object" }
+      response_format: STOCK_PICKS_RESPONSE_FORMAT
     });
 
-    const stockPicks = JSON.parse(completion.choices[0].message.content);
-
     res.status(200).json({
       success: true,
       stockPicks
@@ -207,16 +251,13 @@ exports.getTaxOptimizationAdvice = async (req, res) => {
     }));
 
     // Use OpenAI for tax optimization advice
-    const completion = await openai.chat.completions.create({
+    const completion = await createChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
-        {
-          role: "system",
-          content: "You are an expert tax advisor specializing in investment tax optimization for retail investors. Provide actionable tax optimization strategies based on the user's portfolio, focusing on tax-loss harvesting opportunities, long-term vs. short-term capital gains considerations, and other tax-efficient investment strategies. Include appropriate disclaimers about consulting with a tax professional."
-        },
+        TAX_OPTIMIZATION_SYSTEM_MESSAGE,
         {
           role: "user",
-          content: `Here is my current portfolio: ${JSON.stringify(portfolioData, null, 2)}. Please provide tax optimization advice.`
+          content: `Here is my current portfolio: ${toPromptJSON(portfolioData)}. Please provide tax optimization advice.`
         }
       ]
     });
@@ -245,15 +286,10 @@ exports.getChatCompletion = async (req, res) => {
 
   try {
     // Add system message if not present
-    const systemMessage = {
-      role: "system",
-      content: "You are an expert financial advisor for retail investors. Provide professional, helpful, and accurate information about investing, personal finance, and financial markets. Always include appropriate disclaimers and risk warnings when discussing investment opportunities or strategies."
-    };
-    
-    const formattedMessages = messages[0]?.role === "system" ? messages : [systemMessage, ...messages];
+    const formattedMessages = messages[0]?.role === "system" ? messages : [CHAT_SYSTEM_MESSAGE, ...messages];
 
     // Use OpenAI for chat completion
-    const completion = await openai.chat.completions.create({
+    const completion = await getOpenAI().chat.completions.create({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: formattedMessages
     });
@@ -85,16 +85,16 @@ const PortfolioSchema = new mongoose.Schema({
 
 // Update portfolio value and cost when saving
 PortfolioSchema.pre('save', function(next) {
-  // Calculate total cost
-  this.totalCost = this.investments.reduce((total, investment) => {
-    return total + (investment.purchasePrice * investment.shares);
-  }, 0);
-
-  // Calculate total value
-  this.totalValue = this.investments.reduce((total, investment) => {
+  // Calculate total cost and total value in a single pass over the holdings
+  let totalCost = 0;
+  let totalValue = 0;
+  for (const investment of this.investments) {
     const currentPrice = investment.currentPrice || investment.purchasePrice;
-    return total + (currentPrice * investment.shares);
-  }, 0);
+    totalCost += investment.purchasePrice * investment.shares;
+    totalValue += currentPrice * investment.shares;
+  }
+  this.totalCost = totalCost;
+  this.totalValue = totalValue;
 
   this.updatedAt = Date.now();
   next();
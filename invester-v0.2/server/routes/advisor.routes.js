@@ -5,6 +5,9 @@ const auth = require('../middleware/auth');
 
 const router = express.Router();
 
+// Accepted risk tolerance levels for portfolio optimization
+const RISK_TOLERANCES = ['low', 'moderate', 'high'];
+
 // All routes require authentication
 router.use(auth);
 
@@ -26,7 +29,7 @@ router.post(
   '/optimize',
   [
     check('portfolioId', 'Portfolio ID is required').not().isEmpty(),
-    check('riskTolerance', 'Risk tolerance is required').isIn(['low', 'moderate', 'high'])
+    check('riskTolerance', 'Risk tolerance is required').isIn(RISK_TOLERANCES)
   ],
   advisorController.getPortfolioOptimizationAdvice
 );
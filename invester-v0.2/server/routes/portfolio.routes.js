@@ -197,6 +197,7 @@ router.post('/:id/investment', [
   
   try {
     const Portfolio = require('../models/portfolio.model');
+    const { getQuote } = require('../services/quote.service');
     const { symbol, name, shares, purchasePrice, purchaseDate, sector, notes } = req.body;
     
     const portfolio = await Portfolio.findOne({ 
@@ -208,13 +209,10 @@ router.post('/:id/investment', [
       return res.status(404).json({ message: 'Portfolio not found' });
     }
     
-    const yahoo = require('yahoo-finance2').default;
-    
-    // Get latest stock price from Yahoo Finance
+    // Get latest stock price from Yahoo Finance only once the portfolio is known to belong to the user
     let currentPrice = purchasePrice;
     try {
-      const quote = await yahoo.quote(symbol);
-      currentPrice = quote.regularMarketPrice;
+      currentPrice = await getQuote(symbol);
     } catch (err) {
       console.error(`Error fetching quote for ${symbol}:`, err.message);
       // Fallback to purchase price if real-time price not available
@@ -289,9 +287,8 @@ router.put('/:id/investment/:investmentId', [
     
     // Try to update current price if possible
     try {
-      const yahoo = require('yahoo-finance2').default;
-      const quote = await yahoo.quote(investment.symbol);
-      investment.currentPrice = quote.regularMarketPrice;
+      const { getQuote } = require('../services/quote.service');
+      investment.currentPrice = await getQuote(investment.symbol);
       investment.lastUpdated = new Date();
     } catch (err) {
       console.error(`Error updating price for ${investment.symbol}:`, err.message);
@@ -373,27 +370,21 @@ router.post('/:id/refresh', async (req, res) => {
       });
     }
     
-    const yahoo = require('yahoo-finance2').default;
+    const { getQuotes } = require('../services/quote.service');
     
     // Get all unique symbols
     const symbols = [...new Set(portfolio.investments.map(inv => inv.symbol))];
     
-    // Get quotes for all symbols
-    const quotes = {};
-    for (const symbol of symbols) {
-      try {
-        const quote = await yahoo.quote(symbol);
-        quotes[symbol] = quote.regularMarketPrice;
-      } catch (err) {
-        console.error(`Error fetching quote for ${symbol}:`, err.message);
-      }
-    }
+    // Get quotes for all symbols in one batched request (symbols that fail are logged and skipped)
+    const quotes = await getQuotes(symbols);
     
     // Update all investments with new prices
+    let updatedCount = 0;
     for (const investment of portfolio.investments) {
       if (quotes[investment.symbol]) {
         investment.currentPrice = quotes[investment.symbol];
         investment.lastUpdated = new Date();
+        updatedCount++;
       }
     }
     
@@ -401,7 +392,9 @@ router.post('/:id/refresh', async (req, res) => {
     
     res.status(200).json({ 
       success: true, 
-      message: 'Portfolio prices updated',
+      message: updatedCount === portfolio.investments.length
+        ? 'Portfolio prices updated'
+        : `Updated prices for ${updatedCount} of ${portfolio.investments.length} investments`,
       data: portfolio 
     });
   } catch (err) {
@@ -1,12 +1,7 @@
 const express = require('express');
 const { check } = require('express-validator');
 const auth = require('../middleware/auth');
-const { OpenAI } = require('openai');
-
-// Initialize OpenAI client
-const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
-});
+const { createChatCompletion, createJSONChatCompletion, toPromptJSON } = require('../services/openai.service');
 
 const router = express.Router();
 
@@ -25,7 +20,7 @@ router.get('/search', async (req, res) => {
     }
     
     // Use OpenAI to retrieve relevant regulations based on query
-    const completion = await openai.chat.completions.create({
+    const completion = await createChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
         {
@@ -61,7 +56,7 @@ router.get('/sec-filings', async (req, res) => {
     }
     
     // Use OpenAI to provide information about SEC filings for the symbol
-    const completion = await openai.chat.completions.create({
+    const filingInfo = await createJSONChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
         {
@@ -76,8 +71,6 @@ router.get('/sec-filings', async (req, res) => {
       response_format: { type: "json_object" }
     });
     
-    const filingInfo = JSON.parse(completion.choices[0].message.content);
-    
     res.status(200).json({
       success: true,
       symbol: symbol.toUpperCase(),
@@ -121,7 +114,7 @@ router.get('/compliance-check', async (req, res) => {
     }));
     
     // Use OpenAI to analyze portfolio for compliance issues
-    const completion = await openai.chat.completions.create({
+    const completion = await createChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
         {
@@ -130,7 +123,7 @@ router.get('/compliance-check', async (req, res) => {
         },
         {
           role: "user",
-          content: `Please analyze this portfolio for compliance issues or regulatory concerns a retail investor should be aware of: ${JSON.stringify(portfolioData, null, 2)}`
+          content: `Please analyze this portfolio for compliance issues or regulatory concerns a retail investor should be aware of: ${toPromptJSON(portfolioData)}`
         }
       ]
     });
@@ -163,7 +156,7 @@ router.get('/insider-trading', async (req, res) => {
     }
     
     // Use OpenAI to provide information about insider trading
-    const completion = await openai.chat.completions.create({
+    const completion = await createChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
         {
@@ -200,7 +193,7 @@ router.get('/country-restrictions', async (req, res) => {
     }
     
     // Use OpenAI to provide information about country-specific investment restrictions
-    const completion = await openai.chat.completions.create({
+    const completion = await createChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
         {
@@ -1,18 +1,40 @@
 const express = require('express');
 const { check } = require('express-validator');
 const auth = require('../middleware/auth');
-const { OpenAI } = require('openai');
-
-// Initialize OpenAI client
-const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
-});
+const { createChatCompletion, createJSONChatCompletion, toPromptJSON } = require('../services/openai.service');
 
 const router = express.Router();
 
 // All routes require authentication
 router.use(auth);
 
+const MS_PER_DAY = 1000 * 60 * 60 * 24;
+
+// Positions held longer than this many days qualify for long-term capital gains treatment
+const LONG_TERM_HOLDING_DAYS = 365;
+
+/**
+ * Summarize the unrealized gain and holding period of a single investment
+ * @param {Object} inv - Portfolio investment
+ * @param {Date} currentDate - Date the gain is measured at
+ * @returns {Object} Investment summary with unrealizedGain and isLongTerm
+ */
+const summarizeInvestmentGain = (inv, currentDate) => {
+  const holdingPeriod = (currentDate - new Date(inv.purchaseDate)) / MS_PER_DAY; // in days
+  const unrealizedGain = (inv.currentPrice - inv.purchasePrice) * inv.shares;
+  
+  return {
+    symbol: inv.symbol,
+    name: inv.name || inv.symbol,
+    shares: inv.shares,
+    purchasePrice: inv.purchasePrice,
+    purchaseDate: inv.purchaseDate,
+    currentPrice: inv.currentPrice,
+    unrealizedGain,
+    isLongTerm: holdingPeriod > LONG_TERM_HOLDING_DAYS
+  };
+};
+
 // @route   POST /api/tax/calculate-gains
 // @desc    Calculate capital gains for portfolio
 // @access  Private
@@ -62,32 +84,19 @@ router.post('/calculate-gains', [
     }
     
     // Transform investment data for capital gains calculation
-    const investmentsData = relevantInvestments.map(inv => {
-      const purchaseDate = new Date(inv.purchaseDate);
-      const currentDate = new Date();
-      const holdingPeriod = (currentDate - purchaseDate) / (1000 * 60 * 60 * 24); // in days
-      const unrealizedGain = (inv.currentPrice - inv.purchasePrice) * inv.shares;
-      
-      return {
-        symbol: inv.symbol,
-        name: inv.name || inv.symbol,
-        shares: inv.shares,
-        purchasePrice: inv.purchasePrice,
-        purchaseDate: inv.purchaseDate,
-        currentPrice: inv.currentPrice,
-        unrealizedGain,
-        isLongTerm: holdingPeriod > 365
-      };
-    });
-    
-    // Calculate capital gains
-    const shortTermGains = investmentsData
-      .filter(inv => !inv.isLongTerm)
-      .reduce((total, inv) => total + inv.unrealizedGain, 0);
-      
-    const longTermGains = investmentsData
-      .filter(inv => inv.isLongTerm)
-      .reduce((total, inv) => total + inv.unrealizedGain, 0);
+    const currentDate = new Date();
+    const investmentsData = relevantInvestments.map(inv => summarizeInvestmentGain(inv, currentDate));
+    
+    // Calculate short- and long-term capital gains in one pass
+    let shortTermGains = 0;
+    let longTermGains = 0;
+    for (const inv of investmentsData) {
+      if (inv.isLongTerm) {
+        longTermGains += inv.unrealizedGain;
+      } else {
+        shortTermGains += inv.unrealizedGain;
+      }
+    }
       
     const totalGains = shortTermGains + longTermGains;
     
@@ -113,10 +122,14 @@ router.post('/calculate-gains', [
 });
 
 // @route   POST /api/tax/tax-loss-harvesting
-// @desc    Generate tax loss harvesting recommendations
+// @desc    Generate tax loss harvesting recommendations. Accepts an optional
+//          positive-integer `limit` in the body; when given, both the returned
+//          opportunities and the positions sent to OpenAI are truncated to the
+//          `limit` largest losses.
 // @access  Private
 router.post('/tax-loss-harvesting', [
-  check('portfolioId', 'Portfolio ID is required').not().isEmpty()
+  check('portfolioId', 'Portfolio ID is required').not().isEmpty(),
+  check('limit', 'Limit must be a positive integer').optional().isInt({ min: 1 })
 ], async (req, res) => {
   const { validationResult } = require('express-validator');
   
@@ -127,7 +140,7 @@ router.post('/tax-loss-harvesting', [
   }
   
   try {
-    const { portfolioId } = req.body;
+    const { portfolioId, limit } = req.body;
     
     const Portfolio = require('../models/portfolio.model');
     
@@ -140,20 +153,29 @@ router.post('/tax-loss-harvesting', [
       return res.status(404).json({ message: 'Portfolio not found' });
     }
     
-    // Identify investments with losses
-    const investmentsWithLosses = portfolio.investments
-      .filter(inv => inv.currentPrice < inv.purchasePrice)
-      .map(inv => ({
+    // Identify investments with losses in a single pass over the holdings
+    const investmentsWithLosses = [];
+    for (const inv of portfolio.investments) {
+      const { purchasePrice, currentPrice } = inv;
+      if (currentPrice >= purchasePrice) continue;
+      
+      investmentsWithLosses.push({
         symbol: inv.symbol,
         name: inv.name || inv.symbol,
         shares: inv.shares,
-        purchasePrice: inv.purchasePrice,
-        currentPrice: inv.currentPrice,
-        totalLoss: (inv.purchasePrice - inv.currentPrice) * inv.shares,
+        purchasePrice,
+        currentPrice,
+        totalLoss: (purchasePrice - currentPrice) * inv.shares,
         purchaseDate: inv.purchaseDate,
         sector: inv.sector || 'Unknown'
-      }))
-      .sort((a, b) => b.totalLoss - a.totalLoss); // Sort by largest loss first
+      });
+    }
+    investmentsWithLosses.sort((a, b) => b.totalLoss - a.totalLoss); // Sort by largest loss first
+    
+    // Keep only the largest losses when the caller asks for a top-N list
+    if (limit !== undefined) {
+      investmentsWithLosses.splice(parseInt(limit, 10));
+    }
     
     if (investmentsWithLosses.length === 0) {
       return res.status(200).json({
@@ -166,7 +188,7 @@ router.post('/tax-loss-harvesting', [
     }
     
     // Use OpenAI to generate tax loss harvesting recommendations
-    const completion = await openai.chat.completions.create({
+    const recommendations = await createJSONChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
         {
@@ -175,14 +197,12 @@ router.post('/tax-loss-harvesting', [
         },
         {
           role: "user",
-          content: `Please analyze these investment positions with unrealized losses and provide tax loss harvesting recommendations: ${JSON.stringify(investmentsWithLosses, null, 2)}`
+          content: `Please analyze these investment positions with unrealized losses and provide tax loss harvesting recommendations: ${toPromptJSON(investmentsWithLosses)}`
         }
       ],
       response_format: { type: "json_object" }
     });
     
-    const recommendations = JSON.parse(completion.choices[0].message.content);
-    
     res.status(200).json({
       success: true,
       data: {
@@ -213,7 +233,7 @@ router.get('/tax-rate-info', async (req, res) => {
     const targetYear = year || new Date().getFullYear();
     
     // Use OpenAI to provide current tax rate information
-    const completion = await openai.chat.completions.create({
+    const taxRateInfo = await createJSONChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
         {
@@ -228,8 +248,6 @@ router.get('/tax-rate-info', async (req, res) => {
       response_format: { type: "json_object" }
     });
     
-    const taxRateInfo = JSON.parse(completion.choices[0].message.content);
-    
     res.status(200).json({
       success: true,
       data: {
@@ -276,26 +294,11 @@ router.post('/estimate-tax-liability', [
     }
     
     // Transform investment data for tax liability estimation
-    const investmentsData = portfolio.investments.map(inv => {
-      const purchaseDate = new Date(inv.purchaseDate);
-      const currentDate = new Date();
-      const holdingPeriod = (currentDate - purchaseDate) / (1000 * 60 * 60 * 24); // in days
-      const unrealizedGain = (inv.currentPrice - inv.purchasePrice) * inv.shares;
-      
-      return {
-        symbol: inv.symbol,
-        name: inv.name || inv.symbol,
-        shares: inv.shares,
-        purchasePrice: inv.purchasePrice,
-        purchaseDate: inv.purchaseDate,
-        currentPrice: inv.currentPrice,
-        unrealizedGain,
-        isLongTerm: holdingPeriod > 365
-      };
-    });
+    const currentDate = new Date();
+    const investmentsData = portfolio.investments.map(inv => summarizeInvestmentGain(inv, currentDate));
     
     // Use OpenAI to estimate tax liability
-    const completion = await openai.chat.completions.create({
+    const taxLiability = await createJSONChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
         {
@@ -304,14 +307,12 @@ router.post('/estimate-tax-liability', [
         },
         {
           role: "user",
-          content: `Please estimate the tax liability for this portfolio in ${country} for the tax year ${year} with an income level of ${incomeLevel} and filing status of ${filingStatus || 'Single'}:\n\n${JSON.stringify(investmentsData, null, 2)}`
+          content: `Please estimate the tax liability for this portfolio in ${country} for the tax year ${year} with an income level of ${incomeLevel} and filing status of ${filingStatus || 'Single'}:\n\n${toPromptJSON(investmentsData)}`
         }
       ],
       response_format: { type: "json_object" }
     });
     
-    const taxLiability = JSON.parse(completion.choices[0].message.content);
-    
     res.status(200).json({
       success: true,
       data: {
@@ -355,8 +356,21 @@ router.get('/tax-planning-advice', async (req, res) => {
       return res.status(404).json({ message: 'Portfolio not found' });
     }
     
+    // Only send the fields the advice depends on, not ids or bookkeeping timestamps
+    const portfolioData = portfolio.investments.map(inv => ({
+      symbol: inv.symbol,
+      name: inv.name || inv.symbol,
+      shares: inv.shares,
+      purchasePrice: inv.purchasePrice,
+      purchaseDate: inv.purchaseDate,
+      currentPrice: inv.currentPrice,
+      sector: inv.sector || 'Unknown',
+      // Free-text notes can carry tax context such as the account a holding sits in
+      notes: inv.notes
+    }));
+    
     // Use OpenAI to generate personalized tax planning advice
-    const completion = await openai.chat.completions.create({
+    const completion = await createChatCompletion({
       model: "gpt-4o", // the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
       messages: [
         {
@@ -365,7 +379,7 @@ router.get('/tax-planning-advice', async (req, res) => {
         },
         {
           role: "user",
-          content: `Please provide personalized tax planning advice for an investor in ${country || 'the United States'} with an income level of ${incomeLevel || 'moderate'} and the following portfolio:\n\n${JSON.stringify(portfolio.investments, null, 2)}`
+          content: `Please provide personalized tax planning advice for an investor in ${country || 'the United States'} with an income level of ${incomeLevel || 'moderate'} and the following portfolio:\n\n${toPromptJSON(portfolioData)}`
         }
       ]
     });
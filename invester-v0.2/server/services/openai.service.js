@@ -0,0 +1,122 @@
+let openai = null;
+
+// The client is only built on first use, so report a missing key once at startup
+// instead of letting the first AI request be the first sign of it
+if (!process.env.OPENAI_API_KEY) {
+  console.warn('OPENAI_API_KEY is not set; AI advisor, tax and regulation routes will fail until it is configured');
+}
+
+/**
+ * Get the shared OpenAI client, loading the SDK on first use
+ * @returns {OpenAI} OpenAI client
+ */
+const getOpenAI = () => {
+  if (!openai) {
+    // Required lazily so servers that never reach an AI route skip the SDK's import cost
+    const { OpenAI } = require('openai');
+
+    // Initialize OpenAI client
+    openai = new OpenAI({
+      apiKey: process.env.OPENAI_API_KEY
+    });
+  }
+  return openai;
+};
+
+// How long a completion is reused for an identical request
+const COMPLETION_TTL_MS = 60 * 60 * 1000;
+const MAX_CACHED_COMPLETIONS = 256;
+
+// request key -> { completion (Promise), createdAt }
+const completionCache = new Map();
+
+// Every parameter is part of the key, so a different model, temperature or
+// token limit never replays another request's result
+const completionKey = (params) => JSON.stringify(params);
+
+// Drop a cached entry, but only if it still holds the given completion
+const forgetCompletion = (key, completion) => {
+  if (completionCache.get(key)?.completion === completion) {
+    completionCache.delete(key);
+  }
+};
+
+/**
+ * Create a chat completion, reusing the result of an identical recent request
+ * @param {Object} params - Chat completion parameters
+ * @returns {Promise<Object>} Chat completion
+ */
+const createChatCompletion = (params) => {
+  const key = completionKey(params);
+
+  const entry = completionCache.get(key);
+  if (entry && Date.now() - entry.createdAt < COMPLETION_TTL_MS) {
+    return entry.completion;
+  }
+  completionCache.delete(key);
+
+  // Cache the pending request so concurrent identical calls share one round trip
+  const completion = getOpenAI().chat.completions.create(params).then(
+    result => {
+      // Only keep completions the model finished; truncated or filtered ones must be retried
+      if (result.choices[0]?.finish_reason !== 'stop') {
+        forgetCompletion(key, completion);
+      }
+      return result;
+    },
+    err => {
+      forgetCompletion(key, completion);
+      throw err;
+    }
+  );
+
+  // Evict the oldest entry once the cache is full (Maps iterate in insertion order)
+  if (completionCache.size >= MAX_CACHED_COMPLETIONS) {
+    completionCache.delete(completionCache.keys().next().value);
+  }
+  completionCache.set(key, { completion, createdAt: Date.now() });
+
+  return completion;
+};
+
+/**
+ * Create a JSON-mode chat completion and parse its content
+ * @param {Object} params - Chat completion parameters with a JSON response_format
+ * @returns {Promise<Object>} Parsed response content
+ */
+const createJSONChatCompletion = async (params) => {
+  const pending = createChatCompletion(params);
+  const completion = await pending;
+
+  try {
+    const { content, refusal } = completion.choices[0].message;
+
+    // Structured outputs report a refusal with null content and finish_reason 'stop'
+    if (refusal || content == null) {
+      throw new Error(refusal ? `Model refused the request: ${refusal}` : 'Model returned no content');
+    }
+
+    return JSON.parse(content);
+  } catch (err) {
+    // Never replay a refused or unparseable completion, but leave a newer entry alone
+    forgetCompletion(completionKey(params), pending);
+    throw err;
+  }
+};
+
+/**
+ * Serialize data for a prompt as compact JSON with fractional numbers rounded
+ * @param {*} value - Data to embed in a prompt
+ * @returns {string} Compact JSON string
+ */
+const toPromptJSON = (value) => JSON.stringify(value, (key, val) => (
+  // Four decimal places is ample for prices and gains, and fewer digits means fewer tokens
+  typeof val === 'number' && !Number.isInteger(val) ? Math.round(val * 1e4) / 1e4 : val
+));
+
+module.exports = {
+  getOpenAI,
+  createChatCompletion,
+  createJSONChatCompletion,
+  toPromptJSON
+};
@@ -0,0 +1,91 @@
+const yahoo = require('yahoo-finance2').default;
+
+// How long a fetched price stays fresh before Yahoo Finance is queried again
+const QUOTE_TTL_MS = 60 * 1000;
+
+// symbol -> { price, fetchedAt }
+const quoteCache = new Map();
+
+const getCachedPrice = (symbol) => {
+  const entry = quoteCache.get(symbol);
+  if (entry && Date.now() - entry.fetchedAt < QUOTE_TTL_MS) {
+    return entry.price;
+  }
+  return undefined;
+};
+
+/**
+ * Get the latest market price for a symbol, served from cache when fresh
+ * @param {string} symbol - Stock symbol
+ * @returns {Promise<number>} Latest regular market price
+ */
+exports.getQuote = async (symbol) => {
+  const key = symbol.toUpperCase();
+
+  const cached = getCachedPrice(key);
+  if (cached !== undefined) {
+    return cached;
+  }
+
+  const quote = await yahoo.quote(key);
+  quoteCache.set(key, { price: quote.regularMarketPrice, fetchedAt: Date.now() });
+
+  return quote.regularMarketPrice;
+};
+
+/**
+ * Get the latest market prices for several symbols in a single request
+ * @param {Array} symbols - Array of stock symbols
+ * @returns {Promise<Object>} Map of requested (uppercased) symbol to latest regular market price
+ */
+exports.getQuotes = async (symbols) => {
+  const prices = {};
+  const missing = [];
+
+  for (const symbol of symbols) {
+    const key = symbol.toUpperCase();
+    const cached = getCachedPrice(key);
+    if (cached !== undefined) {
+      prices[key] = cached;
+    } else {
+      missing.push(key);
+    }
+  }
+
+  if (missing.length > 0) {
+    let quotes = [];
+    try {
+      // Yahoo Finance accepts a list of symbols and returns one quote per match
+      quotes = await yahoo.quote(missing);
+    } catch (err) {
+      console.error(`Error fetching batched quotes for ${missing.join(', ')}:`, err.message);
+    }
+
+    // Index by the symbol Yahoo returned so results map back onto the requested keys
+    const returned = new Map(quotes.map(quote => [quote.symbol.toUpperCase(), quote]));
+    const fetchedAt = Date.now();
+    const unresolved = [];
+
+    for (const key of missing) {
+      const quote = returned.get(key);
+      if (quote) {
+        prices[key] = quote.regularMarketPrice;
+        quoteCache.set(key, { price: quote.regularMarketPrice, fetchedAt });
+      } else {
+        unresolved.push(key);
+      }
+    }
+
+    // Fall back to one request per symbol so a single bad ticker cannot sink the whole batch.
+    // These run one at a time so a rate-limited or failing batch is not followed by a burst.
+    for (const key of unresolved) {
+      try {
+        prices[key] = await exports.getQuote(key);
+      } catch (err) {
+        console.error(`Error fetching quote for ${key}:`, err.message);
+      }
+    }
+  }
+
+  return prices;
+};